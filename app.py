@@ -1,18 +1,30 @@
-# app.py  (PostgreSQL version, auto-create table + html view)
+# app.py  (submissions to PostgreSQL by default, or a CSV log via STORAGE_BACKEND)
 from __future__ import annotations
+import csv
+import hashlib
+import hmac
+import io
 import os
-import mimetypes
 import pathlib
+import queue
+import tempfile
 import logging
-from datetime import datetime
-from typing import Optional
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Optional, Protocol
+from urllib.parse import quote
 
-from flask import Flask, request, jsonify, send_file, render_template_string
+from flask import Flask, Response, abort, request, send_file, render_template_string
+import orjson
 from dotenv import load_dotenv
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 
 # PostgreSQL driver
-import psycopg2
 from psycopg2 import OperationalError
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool, PoolError
 
 # Load .env
 load_dotenv()
@@ -22,6 +34,12 @@ HOST = os.getenv("HOST", "0.0.0.0")
 PORT = int(os.getenv("PORT", 5000))
 DEBUG = os.getenv("DEBUG", "false").strip().lower() in ("1", "true", "yes")
 
+# Shared secret for /export.xlsx (X-Export-Token header); unset disables it
+EXPORT_TOKEN = os.getenv("EXPORT_TOKEN", "")
+
+# Where submissions go: pg | csv | xlsx | null
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "pg").strip().lower()
+
 # ---------- PostgreSQL connection info ----------
 DB_HOST = os.getenv("DB_HOST")          # e.g. dpg-d4skbvumcj7s73c29e00-a (internal)
 DB_PORT = int(os.getenv("DB_PORT", 5432))
@@ -43,6 +61,13 @@ logging.info(
 BASE_DIR = pathlib.Path(__file__).resolve().parent
 ASSETS_DIR = BASE_DIR / "assets"
 
+# File-based submission log (STORAGE_BACKEND=csv / xlsx). BASE_DIR is the
+# static root, so the default lives outside it; never point this inside it.
+SUBMISSIONS_CSV = pathlib.Path(
+    os.getenv("SUBMISSIONS_CSV", pathlib.Path.home() / ".gaurav-engineering" / "submissions.csv")
+).expanduser()
+SUBMISSION_HEADER = ["timestamp_utc", "name", "email", "mobile", "pdf_requested"]
+
 # Map keys -> filenames (exact file names inside assets/)
 PDF_KEY_MAP = {
     "air-cool": "Air-Cool .pdf",
@@ -53,15 +78,53 @@ PDF_KEY_MAP = {
     "palletizing": "Palletizing Equipement  .pdf",
 }
 
+# Used (in this order) when the key matches nothing
+FALLBACK_TERMS = ("air", "cutter", "compactor", "force", "feeder", "dry", "wash", "size", "pallet")
+
 ALLOWED_PDF_EXTS = {".pdf", ".PDF"}
+PDF_SUFFIXES = tuple({ext.lower() for ext in ALLOWED_PDF_EXTS})   # for str.endswith
+PDF_MIMETYPE = "application/pdf"   # only .pdf is served, no need to guess per request
+# Clients may keep a copy but must revalidate it (ETag) on every download
+PDF_CACHE_CONTROL = "private, max-age=0, must-revalidate"
 MAX_FIELD_LEN = 300
 
+# Who transfers the PDF bytes for /download:
+#   ""                 -> this process (Flask send_file), the default
+#   "x-sendfile"       -> Apache with mod_xsendfile (`XSendFile On`)
+#   "x-accel-redirect" -> nginx, which needs an internal location such as
+#                         location /protected/ { internal; alias /app/assets/; }
+#                         (with `sendfile on; tcp_nopush on;` for zero-copy)
+SENDFILE_MODE = os.getenv("SENDFILE_MODE", "").strip().lower()
+X_ACCEL_PREFIX = os.getenv("X_ACCEL_PREFIX", "/protected/")
+if SENDFILE_MODE not in ("", "x-sendfile", "x-accel-redirect"):
+    logging.warning("Unknown SENDFILE_MODE=%r; serving files from Python", SENDFILE_MODE)
+
 app = Flask(__name__, static_folder=".", static_url_path="/")
+app.config["USE_X_SENDFILE"] = SENDFILE_MODE == "x-sendfile"
+
+# The static root is the project directory: never serve data, secrets or code
+PRIVATE_STATIC_SUFFIXES = (".csv", ".xlsx", ".env", ".py")
+
+
+@app.before_request
+def block_private_static_files():
+    if request.endpoint == "static":
+        filename = (request.view_args or {}).get("filename", "")
+        if filename.lower().endswith(PRIVATE_STATIC_SUFFIXES):
+            abort(404)
 
 
 # ---------- Utilities ----------
 def safe_str(s: Optional[str]) -> str:
-    return (s or "").strip()
+    # NUL is valid JSON but Postgres text columns reject it
+    return (s or "").replace("\x00", "").strip()
+
+
+def json_response(obj, status: int = 200) -> Response:
+    """
+    jsonify() replacement backed by orjson (also serializes datetimes natively).
+    """
+    return Response(orjson.dumps(obj), status=status, mimetype="application/json")
 
 
 def validate_submission(name: str, email: str, mobile: str) -> Optional[str]:
@@ -76,64 +139,140 @@ def validate_submission(name: str, email: str, mobile: str) -> Optional[str]:
     return None
 
 
+# Cached listing of assets/*.pdf, rescanned at most every PDF_INDEX_TTL seconds
+PDF_INDEX_TTL = float(os.getenv("PDF_INDEX_TTL", 60))
+# Common keys pre-resolved per scan: PDF_KEY_MAP keys and exact lowercased names
+_PDF_BY_KEY: dict[str, pathlib.Path] = {}
+_PDF_LOWER: list[tuple[str, pathlib.Path]] = []   # (lowercased filename, path), scan order
+_PDF_FALLBACK: Optional[pathlib.Path] = None       # result when the key matches nothing
+# path -> (size, mtime_ns, etag, last_modified); hashes are reused while size/mtime hold
+_PDF_META: dict[pathlib.Path, tuple[int, int, str, datetime]] = {}
+_pdf_index_loaded_at = 0.0
+_pdf_index_lock = threading.Lock()
+
+
+def load_pdf_index():
+    """
+    Scan assets/ once and cache the PDF files found there.
+    """
+    global _PDF_BY_KEY, _PDF_LOWER, _PDF_FALLBACK, _PDF_META, _pdf_index_loaded_at
+
+    pdf_files = []
+    if not ASSETS_DIR.exists():
+        logging.error("Assets directory %s does not exist", ASSETS_DIR)
+    else:
+        # DirEntry.is_file() answers from the readdir data, no extra stat
+        with os.scandir(ASSETS_DIR) as entries:
+            pdf_files = [
+                pathlib.Path(e.path) for e in entries
+                if e.name.lower().endswith(PDF_SUFFIXES)
+                and e.is_file(follow_symlinks=False)
+            ]
+        if not pdf_files:
+            logging.warning("No PDF files found in assets directory.")
+
+    lower = [(p.name.lower(), p) for p in pdf_files]
+    index = {}
+    for lname, p in lower:
+        index.setdefault(lname, p)
+
+    # 1) direct mapping, 2) substring match for exact names -- the first
+    # file in scan order containing the name wins, as in find_pdf_by_key()
+    by_key = {}
+    for key, mapped in PDF_KEY_MAP.items():
+        if mapped.lower() in index:
+            by_key[key] = index[mapped.lower()]
+    for lname in index:
+        by_key.setdefault(lname, next(p for other, p in lower if lname in other))
+
+    # 3) generic fallback terms, 4) any PDF as last resort (independent of the key)
+    fallback = pdf_files[0] if pdf_files else None
+    for term in FALLBACK_TERMS:
+        hit = next((p for lname, p in lower if term in lname), None)
+        if hit:
+            fallback = hit
+            break
+
+    meta = {}
+    for p in pdf_files:
+        try:
+            st = p.stat()
+            old = _PDF_META.get(p)
+            if old and old[:2] == (st.st_size, st.st_mtime_ns):
+                meta[p] = old
+            else:
+                mtime = datetime.fromtimestamp(st.st_mtime, timezone.utc)
+                meta[p] = (st.st_size, st.st_mtime_ns, _file_etag(p), mtime)
+        except OSError as e:
+            logging.warning("Cannot compute ETag for %s: %s", p.name, e)
+
+    _PDF_BY_KEY, _PDF_LOWER, _PDF_FALLBACK, _PDF_META = by_key, lower, fallback, meta
+    _pdf_index_loaded_at = time.monotonic()
+
+
+def _file_etag(path: pathlib.Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 16), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def refresh_pdf_index():
+    """
+    Rescan assets/ if the cached listing is older than PDF_INDEX_TTL.
+    Only one thread rescans; the others keep using the current listing.
+    """
+    if time.monotonic() - _pdf_index_loaded_at < PDF_INDEX_TTL:
+        return
+    if not _pdf_index_lock.acquire(blocking=False):
+        return
+    try:
+        load_pdf_index()
+    finally:
+        _pdf_index_lock.release()
+
+
 def find_pdf_by_key(key: Optional[str] = None) -> Optional[pathlib.Path]:
     """
     Find a PDF file in assets/ using:
     - exact key mapping (PDF_KEY_MAP)
     - substring search
     - fallback keywords
+    Known keys are one dict lookup; anything else is a single pass over
+    the cached lowercased names.
     """
-    if not ASSETS_DIR.exists():
-        logging.error("Assets directory %s does not exist", ASSETS_DIR)
-        return None
-
+    refresh_pdf_index()
+    by_key, lower, fallback = _PDF_BY_KEY, _PDF_LOWER, _PDF_FALLBACK
     wanted = (key or "").strip().lower()
-    pdf_files = [
-        p for p in ASSETS_DIR.iterdir()
-        if p.is_file() and p.suffix.lower() in ALLOWED_PDF_EXTS
-    ]
 
-    if not pdf_files:
-        logging.warning("No PDF files found in assets directory.")
-        return None
+    hit = by_key.get(wanted)
+    if hit is None and wanted:
+        hit = next((p for lname, p in lower if wanted in lname), None)
+    return hit or fallback
 
-    # 1) direct mapping
-    if wanted:
-        mapped = PDF_KEY_MAP.get(wanted)
-        if mapped:
-            candidate = ASSETS_DIR / mapped
-            if candidate.exists():
-                return candidate
 
-    # 2) substring match
-    if wanted:
-        for p in pdf_files:
-            if wanted in p.name.lower():
-                return p
+load_pdf_index()
 
-    # 3) generic fallback terms
-    fallback_terms = ["air", "cutter", "compactor", "force", "feeder", "dry", "wash", "size", "pallet"]
-    for term in fallback_terms:
-        for p in pdf_files:
-            if term in p.name.lower():
-                return p
 
-    # 4) any PDF as last resort
-    return pdf_files[0]
+# ---------- DB helpers ----------
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", 2))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", 10))
 
 
-# ---------- DB helpers ----------
-def get_db_connection():
+def init_db_pool():
     """
-    Returns a PostgreSQL connection or None if not available.
-    Uses Render's internal hostname (DB_HOST).
+    Create the process-wide PostgreSQL connection pool.
+    Returns the pool or None if the DB is not configured / reachable.
     """
     if not DB_HOST or not DB_USER or not DB_NAME:
         logging.warning("DB not configured properly (DB_HOST/DB_USER/DB_NAME missing)")
         return None
 
     try:
-        conn = psycopg2.connect(
+        return ThreadedConnectionPool(
+            minconn=DB_POOL_MIN,
+            maxconn=DB_POOL_MAX,
             host=DB_HOST,
             port=DB_PORT,
             user=DB_USER,
@@ -141,88 +280,476 @@ def get_db_connection():
             dbname=DB_NAME,
             connect_timeout=10,
         )
+    except OperationalError as e:
+        logging.error("Failed to create PostgreSQL pool: %s", e)
+        return None
+
+
+# Created lazily so a preloading gunicorn master never holds sockets
+# that forked workers would share (see gunicorn.conf.py post_fork).
+POOL = None
+_POOL_LOCK = threading.Lock()
+
+
+def get_db_pool():
+    global POOL
+    if POOL is None:
+        with _POOL_LOCK:
+            if POOL is None:
+                POOL = init_db_pool()
+    return POOL
+
+
+def get_db_connection():
+    """
+    Borrow a PostgreSQL connection from the pool, or None if not available.
+    Every connection must be handed back with release_db_connection().
+    """
+    pool = get_db_pool()
+    if pool is None:
+        logging.warning("No DB pool available")
+        return None
+
+    try:
+        conn = pool.getconn()
         conn.autocommit = True
         return conn
-    except OperationalError as e:
-        logging.error("Failed to connect to PostgreSQL: %s", e)
+    except (PoolError, OperationalError) as e:
+        logging.error("Failed to get PostgreSQL connection from pool: %s", e)
         return None
 
 
+def release_db_connection(conn, close: bool = False):
+    """
+    Return a connection to the pool. Broken connections are discarded
+    so the pool reconnects on the next getconn().
+    """
+    if conn is None or POOL is None:
+        return
+    try:
+        POOL.putconn(conn, close=close or bool(conn.closed))
+    except Exception:
+        logging.exception("Failed to return connection to pool")
+
+
+_TABLE_READY = False
+
+
 def ensure_submissions_table():
     """
-    Create the submissions table if it does not exist.
-    Safe to call multiple times.
+    Create the submissions table (and its index) if it does not exist.
+    Safe to call multiple times; only talks to the DB until it succeeds once.
     """
+    global _TABLE_READY
+    if _TABLE_READY:
+        return True
+
     conn = get_db_connection()
     if not conn:
         logging.error("Cannot ensure table; no DB connection.")
         return False
 
+    broken = False
     try:
         with conn.cursor() as cur:
             cur.execute(
                 """
                 CREATE TABLE IF NOT EXISTS submissions (
                     id SERIAL PRIMARY KEY,
-                    timestamp_utc TIMESTAMPTZ NOT NULL,
+                    timestamp_utc TIMESTAMPTZ NOT NULL DEFAULT now(),
                     name TEXT NOT NULL,
                     email TEXT NOT NULL,
                     mobile TEXT NOT NULL,
                     pdf_requested TEXT NOT NULL
                 );
+                -- tables created before timestamp_utc had a default; only
+                -- ALTER (ACCESS EXCLUSIVE lock) when it is actually missing
+                DO $$
+                BEGIN
+                    IF EXISTS (
+                        SELECT 1 FROM information_schema.columns
+                        WHERE table_schema = current_schema()
+                          AND table_name = 'submissions'
+                          AND column_name = 'timestamp_utc'
+                          AND column_default IS NULL
+                    ) THEN
+                        ALTER TABLE submissions ALTER COLUMN timestamp_utc SET DEFAULT now();
+                    END IF;
+                END $$;
+                CREATE INDEX IF NOT EXISTS submissions_ts_idx
+                    ON submissions (timestamp_utc DESC);
                 """
             )
-        conn.close()
+        _TABLE_READY = True
         logging.info("Ensured submissions table exists.")
         return True
     except Exception as e:
+        broken = isinstance(e, OperationalError)
         logging.exception("Failed to ensure submissions table: %s", e)
-        try:
-            conn.close()
-        except Exception:
-            pass
         return False
+    finally:
+        release_db_connection(conn, close=broken)
 
 
-def save_submission_pg(name: str, email: str, mobile: str, pdf_name: Optional[str]) -> bool:
+def get_live_db_connection():
     """
-    Insert submission into `submissions` table. Returns True on success.
+    Borrow a pooled connection that has just answered `SELECT 1`.
+    Pooled connections can go stale (server restart, failover, idle
+    disconnect); a dead one is discarded and replaced once.
+    Returns None if no working connection is available.
     """
-    conn = get_db_connection()
+    for attempt in (1, 2):
+        conn = get_db_connection()
+        if not conn:
+            return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            return conn
+        except OperationalError as e:
+            release_db_connection(conn, close=True)
+            logging.warning("Stale DB connection (%s); trying a fresh one", e)
+    return None
+
+
+def run_db_write(op) -> bool:
+    """
+    Run op(conn) once on a live pooled connection. Staleness is detected by
+    the ping in get_live_db_connection(), before any data is sent, so op
+    itself is never retried (a failure during COMMIT may already have
+    stored the rows). Returns False if no connection is available; errors
+    from op propagate.
+    """
+    conn = get_live_db_connection()
     if not conn:
         logging.error("No DB connection available")
         return False
 
     try:
+        op(conn)
+        return True
+    finally:
+        # release_db_connection() discards it if op left it closed
+        release_db_connection(conn)
+
+
+def save_submission_pg(name: str, email: str, mobile: str, pdf_name: Optional[str]) -> bool:
+    """
+    Insert submission into `submissions` table. Returns True on success.
+    """
+    def insert(conn):
         with conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO submissions (timestamp_utc, name, email, mobile, pdf_requested)
-                VALUES (%s, %s, %s, %s, %s)
+                INSERT INTO submissions (name, email, mobile, pdf_requested)
+                VALUES (%s, %s, %s, %s)
                 """,
-                (datetime.utcnow(), name, email, mobile, pdf_name or ""),
+                (name, email, mobile, pdf_name or ""),
             )
-        conn.close()
+
+    try:
+        if not run_db_write(insert):
+            return False
         logging.info("Saved submission for %s <%s>", name, email)
         return True
     except Exception as e:
         logging.exception("Failed to insert submission into DB: %s", e)
+        return False
+
+
+def save_submissions_pg_batch(rows: list[tuple]) -> bool:
+    """
+    Insert many (name, email, mobile, pdf_name) rows in one statement and
+    one transaction. Returns True on success. If the batch is rejected for
+    a reason other than the connection, rows are retried one at a time so
+    a single bad row cannot drop the others.
+    """
+    values = [(name, email, mobile, pdf_name or "") for name, email, mobile, pdf_name in rows]
+
+    def insert(conn):
+        conn.autocommit = False
+        with conn, conn.cursor() as cur:
+            execute_values(
+                cur,
+                """
+                INSERT INTO submissions (name, email, mobile, pdf_requested)
+                VALUES %s
+                """,
+                values,
+                page_size=SUBMISSION_BATCH_MAX,
+            )
+
+    try:
+        if not run_db_write(insert):
+            return False
+        logging.info("Saved %d submissions", len(values))
+        return True
+    except OperationalError as e:
+        logging.exception("Failed to insert submission batch into DB: %s", e)
+        return False
+    except Exception as e:
+        logging.warning("Submission batch rejected (%s); saving rows one by one", e)
+
+    results = [save_submission_pg(*row) for row in rows]
+    return all(results)
+
+
+def init_db():
+    """
+    Per-process DB setup: open the pool and make sure the table exists.
+    Called from gunicorn's post_fork hook and from __main__.
+    """
+    get_db_pool()
+    return ensure_submissions_table()
+
+
+# ---------- Submission storage ----------
+# Rows are (name, email, mobile, pdf_name) tuples, written by the
+# background writer thread below.
+class SubmissionSink(Protocol):
+    def setup(self) -> bool:
+        """Per-process initialisation; runs after fork."""
+        ...
+
+    def write(self, name: str, email: str, mobile: str, pdf_name: Optional[str]) -> bool:
+        ...
+
+    def write_many(self, rows: list[tuple]) -> bool:
+        ...
+
+
+class PgSink:
+    def setup(self) -> bool:
+        return init_db()
+
+    def write(self, name, email, mobile, pdf_name) -> bool:
+        return save_submission_pg(name, email, mobile, pdf_name)
+
+    def write_many(self, rows) -> bool:
+        return save_submissions_pg_batch(rows)
+
+
+class CsvSink:
+    """
+    Appends to submissions.csv through one file handle kept open per
+    process, so a write is a single write() with no open/stat/close.
+    Each batch goes out as one O_APPEND write, so rows from different
+    gunicorn workers do not interleave.
+    """
+
+    def __init__(self, path: pathlib.Path = SUBMISSIONS_CSV):
+        self.path = path
+        self._fh = None
+        self._lock = threading.Lock()
+
+    def setup(self) -> bool:
+        with self._lock:
+            return self._open()
+
+    def _open(self) -> bool:
+        if self._fh is not None:
+            return True
         try:
-            conn.close()
-        except Exception:
+            if not self.path.exists():
+                self._create_with_header()
+            self._fh = open(self.path, "a", newline="", encoding="utf-8")
+            return True
+        except OSError as e:
+            logging.error("Cannot open %s: %s", self.path, e)
+            self._fh = None
+            return False
+
+    def _create_with_header(self):
+        """
+        Create the log with its header in one step: write a private temp
+        file and hard-link it into place. link() fails if another worker
+        got there first, so exactly one header is written and no row can
+        land before it.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        try:
+            tmp.write_text(self._format([SUBMISSION_HEADER]), encoding="utf-8", newline="")
+            os.link(tmp, self.path)
+        except FileExistsError:
             pass
-        return False
+        finally:
+            tmp.unlink(missing_ok=True)
+
+    @staticmethod
+    def _format(rows) -> str:
+        buf = io.StringIO()
+        csv.writer(buf, lineterminator="\n").writerows(rows)
+        return buf.getvalue()
+
+    def write(self, name, email, mobile, pdf_name) -> bool:
+        return self.write_many([(name, email, mobile, pdf_name)])
+
+    def write_many(self, rows) -> bool:
+        ts = datetime.utcnow().isoformat()
+        with self._lock:
+            if not self._open():
+                return False
+            try:
+                self._fh.write(self._format((ts, n, e, m, p or "") for n, e, m, p in rows))
+                self._fh.flush()
+                return True
+            except OSError as e:
+                logging.error("Failed to append to %s: %s", self.path, e)
+                return False
+
+
+class NullSink:
+    def setup(self) -> bool:
+        return True
+
+    def write(self, name, email, mobile, pdf_name) -> bool:
+        return True
+
+    def write_many(self, rows) -> bool:
+        return True
 
 
-# ---------- Call table creation at import ----------
-# This runs once when app.py is imported by gunicorn
-ensure_submissions_table()
+# "xlsx" appends to the CSV too: rewriting a workbook per batch is not safe
+# across gunicorn workers. The .xlsx is built on demand by /export.xlsx.
+SINKS = {"pg": PgSink, "csv": CsvSink, "xlsx": CsvSink, "null": NullSink}
+if STORAGE_BACKEND not in SINKS:
+    logging.warning("Unknown STORAGE_BACKEND=%r; using 'pg'", STORAGE_BACKEND)
+SINK: SubmissionSink = SINKS.get(STORAGE_BACKEND, PgSink)()
+
+
+def init_storage() -> bool:
+    """
+    Per-process setup of the selected submission sink.
+    Called from gunicorn's post_fork hook and from __main__.
+    """
+    return SINK.setup()
+
+
+# ---------- Background submission writer ----------
+# /download only enqueues; one thread per process hands rows to SINK so the
+# file response is not held up by the database (or file) write.
+SUBMISSION_QUEUE_MAX = int(os.getenv("SUBMISSION_QUEUE_MAX", 1000))
+SUBMISSION_BATCH_MAX = int(os.getenv("SUBMISSION_BATCH_MAX", 100))
+SUBMISSION_BATCH_WAIT = float(os.getenv("SUBMISSION_BATCH_WAIT", 0.1))   # seconds
+SUBMISSION_QUEUE: queue.Queue = queue.Queue(maxsize=SUBMISSION_QUEUE_MAX)
+_STOP = object()
+_writer_thread: Optional[threading.Thread] = None
+_writer_lock = threading.Lock()
+
+
+def _next_batch() -> tuple[list[tuple], bool]:
+    """
+    Block for one queued row, then collect more until SUBMISSION_BATCH_MAX
+    rows or SUBMISSION_BATCH_WAIT seconds, whichever comes first.
+    Returns (rows, stop_requested).
+    """
+    rows = []
+    item = SUBMISSION_QUEUE.get()
+    deadline = time.monotonic() + SUBMISSION_BATCH_WAIT
+    while True:
+        SUBMISSION_QUEUE.task_done()
+        if item is _STOP:
+            return rows, True
+        rows.append(item)
+        if len(rows) >= SUBMISSION_BATCH_MAX:
+            return rows, False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return rows, False
+        try:
+            item = SUBMISSION_QUEUE.get(timeout=remaining)
+        except queue.Empty:
+            return rows, False
+
+
+def _submission_writer():
+    while True:
+        rows, stop = _next_batch()
+        try:
+            if len(rows) == 1:
+                ok = SINK.write(*rows[0])
+            else:
+                ok = not rows or SINK.write_many(rows)
+            if not ok:
+                logging.warning("Failed to save %d submission(s).", len(rows))
+        except Exception:
+            logging.exception("Exception while saving submissions")
+        if stop:
+            return
+
+
+def start_submission_writer():
+    """
+    Start this process's writer thread (no-op if already running).
+    Must run after fork: threads do not survive into gunicorn workers.
+    """
+    global _writer_thread
+    with _writer_lock:
+        if _writer_thread is None or not _writer_thread.is_alive():
+            _writer_thread = threading.Thread(
+                target=_submission_writer, name="submission-writer", daemon=True
+            )
+            _writer_thread.start()
+
+
+def stop_submission_writer(timeout: float = 5.0):
+    """
+    Let the writer drain what is already queued, then stop it.
+    """
+    global _writer_thread
+    with _writer_lock:
+        thread, _writer_thread = _writer_thread, None
+    if thread is None or not thread.is_alive():
+        return
+    try:
+        SUBMISSION_QUEUE.put(_STOP, timeout=timeout)
+    except queue.Full:
+        logging.warning("Submission queue full at shutdown; pending rows dropped")
+        return
+    thread.join(timeout)
+    if thread.is_alive():
+        logging.warning("Submission writer did not finish within %.1fs", timeout)
+
+
+def enqueue_submission(name: str, email: str, mobile: str, pdf_name: Optional[str]) -> bool:
+    """
+    Queue a submission for the writer thread. Returns False if it was dropped.
+    """
+    if _writer_thread is None:
+        start_submission_writer()
+    try:
+        SUBMISSION_QUEUE.put_nowait((name, email, mobile, pdf_name))
+        return True
+    except queue.Full:
+        logging.error("Submission queue full; dropping submission for %s <%s>", name, email)
+        return False
 
 
 # ---------- Routes ----------
+def db_backend_required() -> Response:
+    """
+    Response for Postgres-only routes when submissions go somewhere else.
+    """
+    return json_response(
+        {"message": f"Not available with STORAGE_BACKEND={STORAGE_BACKEND}; submissions are not in the database."},
+        501,
+    )
+
+
+# /health body, rebuilt at most once per second: (monotonic time, bytes)
+_health_cache = (float("-inf"), b"")
+
+
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "time": datetime.utcnow().isoformat()}), 200
+    global _health_cache
+    built_at, body = _health_cache
+    now = time.monotonic()
+    if now - built_at >= 1.0:
+        body = orjson.dumps({"status": "ok", "time": datetime.utcnow()})
+        _health_cache = (now, body)
+    return Response(body, status=200, mimetype="application/json")
 
 
 @app.route("/db-check", methods=["GET"])
@@ -230,19 +757,24 @@ def db_check():
     """
     Quick check: can the app reach Postgres and see the submissions table?
     """
+    if not isinstance(SINK, PgSink):
+        return db_backend_required()
     conn = get_db_connection()
     if not conn:
-        return jsonify({"ok": False, "message": "no DB connection"}), 200
+        return json_response({"ok": False, "message": "no DB connection"}, 200)
 
+    broken = False
     try:
         with conn.cursor() as cur:
             cur.execute("SELECT COUNT(*) FROM submissions")
             count = cur.fetchone()[0]
-        conn.close()
-        return jsonify({"ok": True, "rows": count}), 200
+        return json_response({"ok": True, "rows": count}, 200)
     except Exception as e:
+        broken = isinstance(e, OperationalError)
         logging.exception("DB check failed")
-        return jsonify({"ok": False, "error": str(e)}), 500
+        return json_response({"ok": False, "error": str(e)}, 500)
+    finally:
+        release_db_connection(conn, close=broken)
 
 
 @app.route("/submissions-view", methods=["GET"])
@@ -250,10 +782,13 @@ def submissions_view():
     """
     Simple HTML view of all submissions (like a basic phpMyAdmin table).
     """
+    if not isinstance(SINK, PgSink):
+        return db_backend_required()
     conn = get_db_connection()
     if not conn:
         return "<h1>DB Error</h1><p>No DB connection.</p>", 500
 
+    broken = False
     try:
         with conn.cursor() as cur:
             cur.execute(
@@ -264,10 +799,12 @@ def submissions_view():
                 """
             )
             rows = cur.fetchall()
-        conn.close()
     except Exception as e:
+        broken = isinstance(e, OperationalError)
         logging.exception("Failed to fetch submissions: %s", e)
         return f"<h1>DB Error</h1><pre>{e}</pre>", 500
+    finally:
+        release_db_connection(conn, close=broken)
 
     html = """
     <!DOCTYPE html>
@@ -322,11 +859,131 @@ def submissions_view():
     return render_template_string(html, rows=rows, count=len(rows))
 
 
+@app.route("/export.xlsx", methods=["GET"])
+def export_xlsx():
+    """
+    Build an .xlsx of all submissions on demand, from Postgres or from the
+    CSV log depending on STORAGE_BACKEND. The workbook is written in
+    openpyxl's write-only mode as rows are read and saved to a temp file,
+    so neither a DOM nor the finished file is held in memory.
+    Requires EXPORT_TOKEN in the X-Export-Token header (not the query
+    string, which ends up in access logs and Referer headers).
+    """
+    if not EXPORT_TOKEN:
+        return json_response({"message": "Export is disabled."}, 404)
+    token = request.headers.get("X-Export-Token", "")
+    if not hmac.compare_digest(token.encode(), EXPORT_TOKEN.encode()):
+        return json_response({"message": "Invalid export token."}, 403)
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("submissions")
+    if isinstance(SINK, CsvSink):
+        err = _export_csv_rows(ws, SINK.path)
+    elif isinstance(SINK, PgSink):
+        err = _export_pg_rows(ws)
+    else:
+        return json_response({"message": f"STORAGE_BACKEND={STORAGE_BACKEND} keeps no submissions."}, 501)
+    if err:
+        return err
+
+    # unlinked temp file; closed (and freed) when the response is done
+    tmp = tempfile.TemporaryFile()
+    try:
+        wb.save(tmp)
+        tmp.seek(0)
+    except Exception:
+        tmp.close()
+        raise
+    return send_file(
+        tmp,
+        as_attachment=True,
+        download_name="submissions.xlsx",
+        mimetype="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+
+
+def _text_cells(ws, values) -> list:
+    """
+    Row for ws.append() with every str forced to a text cell. Submitted
+    values like '=HYPERLINK(...)' would otherwise be stored as formulas.
+    """
+    cells = []
+    for v in values:
+        if isinstance(v, str):
+            cell = WriteOnlyCell(ws, value=v)
+            cell.data_type = "s"
+            cells.append(cell)
+        else:
+            cells.append(v)
+    return cells
+
+
+def _export_csv_rows(ws, path: pathlib.Path) -> Optional[Response]:
+    """
+    Copy the CSV log into the sheet. Returns an error response or None.
+    """
+    try:
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            ws.append(_text_cells(ws, next(reader, SUBMISSION_HEADER)))
+            for row in reader:
+                ws.append(_text_cells(ws, row))
+    except FileNotFoundError:
+        ws.append(SUBMISSION_HEADER)
+    except (OSError, csv.Error) as e:
+        logging.exception("Failed to export submissions from %s: %s", path, e)
+        return json_response({"message": "Failed to export submissions."}, 500)
+    return None
+
+
+def _export_pg_rows(ws) -> Optional[Response]:
+    """
+    Stream the submissions table into the sheet through a server-side
+    cursor. Returns an error response or None.
+    """
+    conn = get_db_connection()
+    if not conn:
+        return json_response({"message": "no DB connection"}, 500)
+
+    ws.append(["id", "timestamp_utc", "name", "email", "mobile", "pdf_requested"])
+    broken = False
+    try:
+        conn.autocommit = False     # named cursors need a transaction
+        with conn, conn.cursor(name="export_submissions") as cur:
+            cur.itersize = 1000
+            cur.execute(
+                """
+                SELECT id, timestamp_utc, name, email, mobile, pdf_requested
+                FROM submissions
+                ORDER BY id
+                """
+            )
+            for row in cur:
+                # Excel cannot store timezone-aware datetimes
+                ts = row[1].astimezone(timezone.utc).replace(tzinfo=None)
+                ws.append(_text_cells(ws, [row[0], ts, *row[2:]]))
+    except Exception as e:
+        broken = isinstance(e, OperationalError)
+        logging.exception("Failed to export submissions: %s", e)
+        return json_response({"message": "Failed to export submissions."}, 500)
+    finally:
+        release_db_connection(conn, close=broken)
+    return None
+
+
 @app.route("/download", methods=["POST"])
 def download():
     if not request.is_json:
-        return jsonify({"message": "Expected JSON body"}), 400
-    payload = request.get_json() or {}
+        return json_response({"message": "Expected JSON body"}, 400)
+    try:
+        payload = orjson.loads(request.get_data(cache=False)) or {}
+    except orjson.JSONDecodeError:
+        return json_response({"message": "Invalid JSON body"}, 400)
+    if not isinstance(payload, dict):
+        return json_response({"message": "Expected JSON object"}, 400)
+    for field in ("name", "email", "mobile", "pdf"):
+        if not isinstance(payload.get(field), (str, type(None))):
+            return json_response({"message": f"Field '{field}' must be a string."}, 400)
 
     name = safe_str(payload.get("name"))
     email_addr = safe_str(payload.get("email"))
@@ -341,37 +998,56 @@ def download():
     err = validate_submission(name, email_addr, mobile)
     if err:
         logging.info("Validation failed: %s", err)
-        return jsonify({"message": err}), 400
+        return json_response({"message": err}, 400)
 
+    # find_pdf_by_key() only returns files it found in the assets/ scan
     pdf_path = find_pdf_by_key(pdf_key)
-    if not pdf_path or not pdf_path.exists():
+    if pdf_path is None:
         logging.error("PDF not found for key=%s", pdf_key)
-        return jsonify({"message": "Requested PDF not found on server."}), 404
+        return json_response({"message": "Requested PDF not found on server."}, 404)
 
-    # save to PostgreSQL (best-effort)
-    try:
-        ok = save_submission_pg(name, email_addr, mobile, pdf_path.name)
-        if not ok:
-            logging.warning("Failed to save submission to DB.")
-    except Exception:
-        logging.exception("Exception while saving to DB")
+    # save submission (best-effort, in the background)
+    enqueue_submission(name, email_addr, mobile, pdf_path.name)
+
+    # client already has this exact file
+    meta = _PDF_META.get(pdf_path)
+    if meta and request.if_none_match.contains_weak(meta[2]):
+        logging.info("Not modified: %s", pdf_path.name)
+        resp = Response(status=304)
+        resp.set_etag(meta[2])
+        resp.headers["Cache-Control"] = PDF_CACHE_CONTROL
+        return resp
 
     # send file
     try:
-        mimetype, _ = mimetypes.guess_type(str(pdf_path))
         logging.info("Serving file: %s", pdf_path.name)
-        return send_file(
-            path_or_file=str(pdf_path),
-            as_attachment=True,
-            download_name=pdf_path.name,
-            mimetype=mimetype or "application/pdf",
-        )
+        if SENDFILE_MODE == "x-accel-redirect":
+            # nginx streams the file; we only send headers
+            resp = Response(mimetype=PDF_MIMETYPE)
+            resp.headers["X-Accel-Redirect"] = X_ACCEL_PREFIX + quote(pdf_path.name)
+            resp.headers.set("Content-Disposition", "attachment", filename=pdf_path.name)
+            if meta:
+                resp.set_etag(meta[2])
+                resp.last_modified = meta[3]
+        else:
+            resp = send_file(
+                path_or_file=str(pdf_path),
+                as_attachment=True,
+                download_name=pdf_path.name,
+                mimetype=PDF_MIMETYPE,
+                etag=meta[2] if meta else True,
+                last_modified=meta[3] if meta else None,
+            )
+        resp.headers["Cache-Control"] = PDF_CACHE_CONTROL
+        return resp
     except Exception:
         logging.exception("Failed to send file")
-        return jsonify({"message": "Internal server error while sending file."}), 500
+        return json_response({"message": "Internal server error while sending file."}, 500)
 
 
 # ---------- Run ----------
 if __name__ == "__main__":
     logging.info("Starting app on %s:%s  DEBUG=%s", HOST, PORT, DEBUG)
+    init_storage()
+    start_submission_writer()
     app.run(host=HOST, port=PORT, debug=DEBUG)
@@ -0,0 +1,33 @@
+# gunicorn.conf.py  (picked up automatically by `gunicorn app:app`)
+import os
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', 5000)}"
+
+# /download blocks on Postgres and file I/O, so use threads per worker
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+threads = int(os.getenv("GUNICORN_THREADS", 5))
+
+# Import app.py once in the master, then fork cheap copies
+preload_app = True
+worker_tmp_dir = "/dev/shm"
+
+# send_file() hands gunicorn a real file via wsgi.file_wrapper; stream it with
+# sendfile(2) (kernel -> socket, no userspace copy) instead of read/write
+sendfile = True
+
+
+def post_fork(server, worker):
+    # DB sockets / file handles cannot be shared across fork: each worker
+    # sets up its own submission sink
+    import app
+
+    app.init_storage()
+    app.start_submission_writer()
+
+
+def worker_exit(server, worker):
+    # Flush queued submissions before the worker goes away
+    import app
+
+    app.stop_submission_writer()